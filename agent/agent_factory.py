@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 from core.observability import setup_phoenix_tracing
 
@@ -108,9 +109,11 @@ def get_prompt() -> str:
 # -------------------------------------------------------------
 # Create Team For User
 # -------------------------------------------------------------
-def create_team_for_user(user_id: str, client=None):
+def create_team_for_user(user_id: str, client=None, instructions: str = None):
     """
     Create a full AI Team for a specific user.
+    `instructions` is the team leader's system prompt; fetched with
+    get_prompt() (a blocking Phoenix call) when not given.
 
     Returns:
         tuple: (model, team)
@@ -248,7 +251,7 @@ Be precise with timestamps and attribute statements accurately to users."""
         members=agents,
         tools=[BioTools(client=client), CalculatorTools()],
         #instructions=get_system_prompt(),  # main system prompt applies team leader
-        instructions=get_prompt(),
+        instructions=instructions if instructions is not None else get_prompt(),
         num_history_runs=AGENT_HISTORY_RUNS,
         add_datetime_to_context=True,
         timezone_identifier="Asia/Kolkata",
@@ -281,6 +284,13 @@ async def get_or_create_team(user_id: str, client=None):
         _user_teams.move_to_end(user_id)
         return _user_teams[user_id]
 
+    # The Phoenix prompt fetch is a blocking HTTP call; keep it off the event loop
+    instructions = await asyncio.to_thread(get_prompt)
+    if user_id in _user_teams:
+        # Another message from this user built the team while we were fetching
+        _user_teams.move_to_end(user_id)
+        return _user_teams[user_id]
+
     # If cache full, evict oldest (least recently used) team
     if len(_user_teams) >= MAX_AGENTS:
         oldest_user, oldest_team = _user_teams.popitem(last=False)
@@ -312,7 +322,7 @@ async def get_or_create_team(user_id: str, client=None):
         except Exception as e:
             logger.error(f"[TeamCache] Error during team cleanup: {e}", exc_info=True)
 
-    _, team = create_team_for_user(user_id, client=client)
+    _, team = create_team_for_user(user_id, client=client, instructions=instructions)
     _user_teams[user_id] = team
     logger.info(f"[TeamCache] Created new team for user {user_id} (cache size: {len(_user_teams)}/{MAX_AGENTS})")
 
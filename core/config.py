@@ -9,6 +9,11 @@ USE_REDIS = os.getenv("USE_REDIS", "false").lower() == "true"
 
 # Postgres Configuration
 POSTGRES_URL = os.getenv("POSTGRES_URL", "")
+# Opt-in session synchronous_commit for pooled connections (e.g. "off" skips waiting on
+# WAL flush, which also covers channel_status writes); empty keeps the server default
+POSTGRES_SYNCHRONOUS_COMMIT = os.getenv("POSTGRES_SYNCHRONOUS_COMMIT", "").strip()
+# Prepared statements asyncpg keeps per pooled connection (0 disables, e.g. behind pgbouncer)
+POSTGRES_STATEMENT_CACHE_SIZE = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "256"))
 
 # Model and Provider Configuration
 PROVIDER = os.getenv("CUSTOM_PROVIDER", "groq")  # default provider
@@ -43,3 +48,4 @@ MCP_URLS = os.getenv("MCP_URLS", "").strip()
 CONTEXT_AGENT_MODEL = os.getenv("CONTEXT_AGENT_MODEL", "gemini-2.5-flash-lite")
 CONTEXT_AGENT_MAX_MESSAGES = int(os.getenv("CONTEXT_AGENT_MAX_MESSAGES", "50000"))
 TEAM_LEADER_CONTEXT_LIMIT = int(os.getenv("TEAM_LEADER_CONTEXT_LIMIT", "100"))
+MAX_PROMPT_CHARS = int(os.getenv("MAX_PROMPT_CHARS", "60000"))  # ~15k tokens at ~4 chars/token
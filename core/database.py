@@ -1,18 +1,31 @@
 import asyncpg
 import logging
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
-from core.config import POSTGRES_URL
+from core.config import POSTGRES_URL, POSTGRES_SYNCHRONOUS_COMMIT, POSTGRES_STATEMENT_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 
 pool: Optional[asyncpg.Pool] = None
 
+async def _init_connection(conn):
+    """Per-connection session settings."""
+    if POSTGRES_SYNCHRONOUS_COMMIT:
+        # Opt-in: trades durability of the last few commits for not waiting on
+        # WAL flush. Passed as a parameter; the value comes from the environment.
+        await conn.execute("SELECT set_config('synchronous_commit', $1, false)", POSTGRES_SYNCHRONOUS_COMMIT)
+
 async def init_db():
     """Initialize the database connection pool."""
     global pool
     try:
-        pool = await asyncpg.create_pool(POSTGRES_URL)
+        # Every query below is a fixed SQL string, so asyncpg's per-connection
+        # statement cache prepares each one once and reuses the plan.
+        pool = await asyncpg.create_pool(
+            POSTGRES_URL,
+            init=_init_connection,
+            statement_cache_size=POSTGRES_STATEMENT_CACHE_SIZE,
+        )
         logger.info("Database connection pool created.")
         await create_schema()
     except Exception as e:
@@ -41,13 +54,31 @@ async def create_schema():
                 author_name TEXT NOT NULL,
                 content TEXT NOT NULL,
                 created_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                timestamp_str TEXT NOT NULL
+                timestamp_str TEXT NOT NULL,
+                created_at_epoch BIGINT
             );
+
+            -- created_at as epoch seconds, so readers format relative times
+            -- without datetime math. Added (and filled in once) on older tables.
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'messages' AND column_name = 'created_at_epoch'
+                ) THEN
+                    ALTER TABLE messages ADD COLUMN created_at_epoch BIGINT;
+                    UPDATE messages SET created_at_epoch = EXTRACT(EPOCH FROM created_at)::bigint;
+                END IF;
+            END $$;
             
             -- Optimized index for fetching recent messages (DESC order)
             CREATE INDEX IF NOT EXISTS idx_messages_channel_created
             ON messages (channel_id, created_at DESC);
             
+            -- Keyset pagination: snowflake ids sort in creation order
+            CREATE INDEX IF NOT EXISTS idx_messages_channel_msgid
+            ON messages (channel_id, message_id DESC);
+            
             -- Index for message_id lookups (upserts)
             CREATE INDEX IF NOT EXISTS idx_messages_message_id
             ON messages (message_id);
@@ -60,9 +91,84 @@ async def create_schema():
                 is_fully_backfilled BOOLEAN DEFAULT FALSE,
                 last_updated TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
             );
+
+            -- Per-channel message counter, so status reports don't aggregate
+            -- the whole messages table. Added and counted once on older tables.
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'channel_status' AND column_name = 'message_count'
+                ) THEN
+                    ALTER TABLE channel_status ADD COLUMN message_count BIGINT NOT NULL DEFAULT 0;
+                    INSERT INTO channel_status (channel_id, message_count)
+                    SELECT channel_id, COUNT(*) FROM messages GROUP BY channel_id
+                    ON CONFLICT (channel_id) DO UPDATE SET message_count = EXCLUDED.message_count;
+                END IF;
+            END $$;
+
+            CREATE INDEX IF NOT EXISTS idx_channel_status_message_count
+            ON channel_status (message_count DESC);
+
+            -- Statement-level triggers keep message_count current: one
+            -- grouped update per statement, so bulk COPY upserts stay cheap.
+            -- ON CONFLICT DO UPDATE rows land in the UPDATE transition table,
+            -- so only genuinely new messages are counted.
+            CREATE OR REPLACE FUNCTION channel_status_count_inserted() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO channel_status (channel_id, message_count)
+                SELECT channel_id, COUNT(*) FROM inserted_rows GROUP BY channel_id
+                ON CONFLICT (channel_id) DO UPDATE
+                SET message_count = channel_status.message_count + EXCLUDED.message_count;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION channel_status_count_deleted() RETURNS trigger AS $$
+            BEGIN
+                UPDATE channel_status cs
+                SET message_count = GREATEST(cs.message_count - d.n, 0)
+                FROM (SELECT channel_id, COUNT(*) AS n FROM deleted_rows GROUP BY channel_id) d
+                WHERE cs.channel_id = d.channel_id;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql;
+
+            -- Created only when missing: trigger DDL takes an ACCESS EXCLUSIVE
+            -- lock on messages, which shouldn't happen on every (re)connect.
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgrelid = 'messages'::regclass AND tgname = 'trg_messages_count_insert'
+                ) THEN
+                    CREATE TRIGGER trg_messages_count_insert
+                    AFTER INSERT ON messages
+                    REFERENCING NEW TABLE AS inserted_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION channel_status_count_inserted();
+                END IF;
+
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgrelid = 'messages'::regclass AND tgname = 'trg_messages_count_delete'
+                ) THEN
+                    CREATE TRIGGER trg_messages_count_delete
+                    AFTER DELETE ON messages
+                    REFERENCING OLD TABLE AS deleted_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION channel_status_count_deleted();
+                END IF;
+            END $$;
         """)
         logger.info("Database schema initialized with optimized indexes.")
 
+# Shared by store_message and store_message_many; kept as one constant so both
+# hit the same prepared statement in each connection's cache.
+UPSERT_MESSAGE_SQL = """
+    INSERT INTO messages (message_id, channel_id, author_id, author_name, content, created_at, timestamp_str, created_at_epoch)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, EXTRACT(EPOCH FROM $6::timestamptz)::bigint)
+    ON CONFLICT (message_id) DO UPDATE SET
+        content = EXCLUDED.content,
+        timestamp_str = EXCLUDED.timestamp_str;
+"""
+
 async def store_message(
     message_id: int,
     channel_id: int,
@@ -78,17 +184,65 @@ async def store_message(
 
     try:
         async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO messages (message_id, channel_id, author_id, author_name, content, created_at, timestamp_str)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-                ON CONFLICT (message_id) DO UPDATE SET
-                    content = EXCLUDED.content,
-                    timestamp_str = EXCLUDED.timestamp_str;
-            """, message_id, channel_id, author_id, author_name, content, created_at, timestamp_str)
+            await conn.execute(
+                UPSERT_MESSAGE_SQL,
+                message_id, channel_id, author_id, author_name, content, created_at, timestamp_str
+            )
     except Exception as e:
         logger.error(f"Failed to store message {message_id}: {e}")
         raise  # Propagate error to caller instead of silently swallowing
 
+async def store_message_many(rows: List[tuple]):
+    """
+    Store or update several messages in one round-trip.
+    Rows are tuples in MESSAGE_COLUMNS order; the statement is prepared once
+    and executed for every row in a single pipelined batch.
+    """
+    if not pool or not rows:
+        return
+
+    try:
+        async with pool.acquire() as conn:
+            await conn.executemany(UPSERT_MESSAGE_SQL, rows)
+    except Exception as e:
+        logger.error(f"Failed to store {len(rows)} messages: {e}")
+        raise
+
+# Column order for bulk message rows (matches store_message's arguments)
+MESSAGE_COLUMNS = ["message_id", "channel_id", "author_id", "author_name", "content", "created_at", "timestamp_str"]
+
+async def store_messages_bulk(rows: List[tuple]):
+    """
+    Store or update many messages in one round-trip.
+    Rows are tuples in MESSAGE_COLUMNS order. They are COPY'd into a
+    per-connection staging table and upserted with a single statement.
+    """
+    if not pool or not rows:
+        return
+
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS messages_staging
+                    (LIKE messages INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+                """)
+                await conn.copy_records_to_table("messages_staging", records=rows, columns=MESSAGE_COLUMNS)
+                # DISTINCT ON: a batch may contain the same message twice, which ON CONFLICT rejects
+                await conn.execute("""
+                    INSERT INTO messages (message_id, channel_id, author_id, author_name, content, created_at, timestamp_str, created_at_epoch)
+                    SELECT DISTINCT ON (message_id)
+                        message_id, channel_id, author_id, author_name, content, created_at, timestamp_str,
+                        EXTRACT(EPOCH FROM created_at)::bigint
+                    FROM messages_staging
+                    ON CONFLICT (message_id) DO UPDATE SET
+                        content = EXCLUDED.content,
+                        timestamp_str = EXCLUDED.timestamp_str;
+                """)
+    except Exception as e:
+        logger.error(f"Failed to bulk store {len(rows)} messages: {e}")
+        raise  # Propagate error to caller instead of silently swallowing
+
 async def delete_message(message_id: int):
     """Delete a message from the database."""
     if not pool:
@@ -99,12 +253,30 @@ async def delete_message(message_id: int):
             await conn.execute("""
                 DELETE FROM messages WHERE message_id = $1
             """, message_id)
-            logger.debug(f"Deleted message {message_id} from database")
+            logger.debug("Deleted message %s from database", message_id)
     except Exception as e:
         logger.error(f"Failed to delete message {message_id}: {e}")
 
-async def get_messages(channel_id: int, limit: int = 2000) -> List[Dict]:
-    """Retrieve the most recent messages for a channel in chronological order."""
+async def delete_messages(message_ids: List[int]):
+    """Delete several messages from the database in one statement."""
+    if not pool or not message_ids:
+        return
+
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                DELETE FROM messages WHERE message_id = ANY($1::bigint[])
+            """, list(message_ids))
+            logger.debug("Deleted %d messages from database", len(message_ids))
+    except Exception as e:
+        logger.error(f"Failed to delete {len(message_ids)} messages: {e}")
+
+async def get_messages(channel_id: int, limit: int = 2000, before_id: Optional[int] = None) -> List[Dict]:
+    """
+    Retrieve the most recent messages for a channel in chronological order.
+    With before_id, only messages older than that id are returned (keyset
+    pagination, so older windows cost the same as the newest one).
+    """
     if not pool:
         return []
 
@@ -112,12 +284,12 @@ async def get_messages(channel_id: int, limit: int = 2000) -> List[Dict]:
         async with pool.acquire() as conn:
             # ORDER BY DESC to get NEWEST messages first, then reverse to chronological
             rows = await conn.fetch("""
-                SELECT message_id, channel_id, author_id, author_name, content, created_at
+                SELECT message_id, channel_id, author_id, author_name, content, created_at, created_at_epoch
                 FROM messages 
-                WHERE channel_id = $1 
-                ORDER BY created_at DESC 
-                LIMIT $2
-            """, channel_id, limit)
+                WHERE channel_id = $1 AND ($2::bigint IS NULL OR message_id < $2)
+                ORDER BY message_id DESC 
+                LIMIT $3
+            """, channel_id, before_id, limit)
             
             # Reverse to chronological order (oldest to newest) for display
             return list(reversed([dict(row) for row in rows]))
@@ -125,6 +297,53 @@ async def get_messages(channel_id: int, limit: int = 2000) -> List[Dict]:
         logger.error(f"Failed to get messages for channel {channel_id}: {e}")
         return []
 
+async def get_message_ids(channel_id: int, limit: int = 2000) -> List[int]:
+    """Retrieve only the ids of a channel's most recent messages (newest first)."""
+    if not pool:
+        return []
+
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT message_id FROM messages
+                WHERE channel_id = $1
+                ORDER BY message_id DESC
+                LIMIT $2
+            """, channel_id, limit)
+            return [row["message_id"] for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to get message ids for channel {channel_id}: {e}")
+        return []
+
+async def get_messages_with_meta(channel_id: int, limit: int = 2000) -> Tuple[List[Dict], bool]:
+    """
+    Retrieve the most recent messages for a channel (chronological) together
+    with the channel's fully-backfilled flag, in one round-trip.
+    """
+    if not pool:
+        return [], False
+
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT m.message_id, m.channel_id, m.author_id, m.author_name, m.content, m.created_at, m.created_at_epoch,
+                       COALESCE(s.is_fully_backfilled, FALSE) AS is_fully_backfilled
+                FROM messages m
+                LEFT JOIN channel_status s ON s.channel_id = m.channel_id
+                WHERE m.channel_id = $1
+                ORDER BY m.message_id DESC
+                LIMIT $2
+            """, channel_id, limit)
+
+            is_full = rows[0]["is_fully_backfilled"] if rows else False
+            messages = [dict(row) for row in reversed(rows)]
+            for m in messages:
+                del m["is_fully_backfilled"]
+            return messages, is_full
+    except Exception as e:
+        logger.error(f"Failed to get messages for channel {channel_id}: {e}")
+        return [], False
+
 async def get_message_count(channel_id: int) -> int:
     """Get the number of messages stored for a channel."""
     if not pool:
@@ -11,10 +11,11 @@ logger = logging.getLogger(__name__)
 # Per-channel locks to prevent race conditions during concurrent backfill
 _backfill_locks = {}
 
-async def backfill_channel(channel, target_limit: int = CONTEXT_AGENT_MAX_MESSAGES):
+async def backfill_channel(channel, target_limit: int = CONTEXT_AGENT_MAX_MESSAGES) -> bool:
     """
     Backfill message history for a channel if DB count is low.
     Thread-safe with per-channel locking.
+    Returns True if the Discord API was called for this channel.
     """
     channel_id = channel.id
     
@@ -30,7 +31,7 @@ async def backfill_channel(channel, target_limit: int = CONTEXT_AGENT_MAX_MESSAG
             # If we have enough messages (e.g. > 90% of target), skip backfill
             if current_count >= target_limit * 0.9:
                 logger.info(f"[Backfill] ✓ Channel {channel_name}: {current_count}/{target_limit} messages (≥90%). Skipping backfill.")
-                return
+                return False
 
             logger.info(f"[Backfill] ▶ Starting backfill for {channel_name}: {current_count}/{target_limit} messages")
             
@@ -60,7 +61,6 @@ async def backfill_channel(channel, target_limit: int = CONTEXT_AGENT_MAX_MESSAG
                 fetched_count = len(await fetch_and_cache_from_api(channel, limit=target_limit))
                 current_count = await get_message_count(channel_id)
                 oldest_id = await get_oldest_message_id(channel_id)  # Update oldest_id after fetch
-                oldest_id = await get_oldest_message_id(channel_id)  # Update oldest_id after fetch
                 
                 # Only mark as fully backfilled if we fetched ZERO messages (reached end of history)
                 # Don't mark just because fetched_count < target_limit (channel might have fewer than target)
@@ -149,9 +149,11 @@ async def backfill_channel(channel, target_limit: int = CONTEXT_AGENT_MAX_MESSAG
             new_count = await get_message_count(channel_id)
             completion_pct = int((new_count / target_limit) * 100) if target_limit > 0 else 100
             logger.info(f"[Backfill] ✓ Completed {channel_name}: {new_count}/{target_limit} ({completion_pct}%) - Fetched {fetched_count} messages this run")
+            return True
             
         except Exception as e:
             logger.error(f"[Backfill] Error backfilling channel {channel_id}: {e}", exc_info=True)
+            return True
 
 async def start_backfill_task(channels):
     """
@@ -166,14 +168,17 @@ async def start_backfill_task(channels):
     
     async def bound_backfill(channel):
         async with sem:
+            hit_api = True
             try:
-                await backfill_channel(channel)
+                hit_api = await backfill_channel(channel)
             except Exception as e:
                 channel_name = getattr(channel, "name", "DM")
                 logger.error(f"[Backfill] Failed for channel {channel_name} ({channel.id}): {e}", exc_info=True)
             finally:
-                # Small sleep to be nice to API even with semaphore
-                await asyncio.sleep(1)
+                # Small sleep to be nice to API even with semaphore; channels
+                # that were already full made no API calls, so don't wait on them
+                if hit_api:
+                    await asyncio.sleep(1)
 
     # Create tasks for all channels
     tasks = [bound_backfill(c) for c in channels]
@@ -2,16 +2,18 @@
 import logging
 import sys
 import time
+from datetime import datetime, timezone
 from discord_bot.discord_utils import resolve_mentions, restore_mentions, correct_mentions
-from agno.media import Image
-# NOTE: updated imports to use team factory functions
-from agent.agent_factory import get_or_create_team, create_team_for_user
-from tools.tools_factory import setup_mcp, get_mcp_tools, MultiMCPTools
+# NOTE: agno.media and agent.agent_factory are imported lazily where used;
+# the agent factory builds every toolkit at import and is only needed once
+# someone actually talks to the bot.
+from tools.tools_factory import setup_mcp, get_mcp_tools
 from discord_bot.context_cache import (
     build_context_prompt,
-    update_message_in_cache,
-    delete_message_from_cache,
     append_message_to_cache,
+    enqueue_cache_op,
+    start_cache_ops_worker,
+    start_cache_sweeper,
 )
 from core.config import TEAM_LEADER_CONTEXT_LIMIT
 from core.execution_context import set_current_channel_id, set_current_channel
@@ -22,10 +24,45 @@ import discord
 
 logger = logging.getLogger(__name__)
 
+CHATBOT_PREFIX = "!"
+# How much of the end of the prompt correct_mentions looks at for names
+MENTION_SOURCE_TAIL_CHARS = 4000
+
+
+def _image_attachments(attachments) -> list:
+    """Wrap the image attachments of a message as agno Images."""
+    from agno.media import Image
+
+    return [
+        Image(url=a.url) for a in attachments
+        if a.content_type and a.content_type.startswith('image/')
+    ]
+
+
+def _mention_source(message, reply_to_message, prompt: str) -> str:
+    """
+    Text for correct_mentions to harvest Name(ID) pairs from: the tail of the
+    prompt plus the people in the current exchange, instead of the whole history.
+    """
+    tail = prompt
+    if len(prompt) > MENTION_SOURCE_TAIL_CHARS:
+        tail = prompt[-MENTION_SOURCE_TAIL_CHARS:]
+        # Drop the partial first line so a cut-off name can't map to an ID
+        tail = tail[tail.find("\n") + 1:]
+
+    people = [message.author, *message.mentions]
+    if reply_to_message:
+        people.append(reply_to_message.author)
+    # Listed last so they win over older same-name entries
+    return tail + "\n" + "\n".join(f"{u.display_name}({u.id})" for u in people)
+
+
 async def async_ask_junkie(user_text: str, user_id: str, session_id: str, images: list = None, client=None) -> str:
     """
     Run the user's Team with improved error handling and response validation.
     """
+    from agent.agent_factory import get_or_create_team
+
     # get_or_create_team returns a Team instance (or equivalent orchestrator)
     team = await get_or_create_team(user_id, client=client)  # NOW ASYNC
     try:
@@ -49,29 +86,49 @@ async def async_ask_junkie(user_text: str, user_id: str, session_id: str, images
 
 
 def setup_chat(bot):
+    # First character of a message -> how on_message should treat it. The
+    # command prefix is inserted last so it wins when both prefixes start with
+    # the same character; on_message then falls through to chat itself.
+    prefix_kinds = {CHATBOT_PREFIX: "chat", bot.prefix[:1]: "command"}
+
     @bot.event
     async def on_ready():
         logger.info("[on_ready] Bot ready event triggered!")
-        # Ensure MCP tools are connected/initialized
-        await setup_mcp()
-        
-        # Initialize Database
+        # MCP connection and database setup are independent: run them concurrently
+        mcp_task = asyncio.create_task(setup_mcp())
         logger.info("[on_ready] Initializing database...")
-        await init_db()
-        logger.info("[on_ready] Database initialized")
-        
-        # Start Backfill Task
-        # Filter for TextChannels, DMs, and GroupChats where the bot has read permissions
-        text_channels = [
-            c for c in bot.bot.get_all_channels() 
-            if isinstance(c, (discord.TextChannel, discord.DMChannel, discord.GroupChannel))
-        ]
-        # Also check private_channels as get_all_channels might miss some DMs depending on cache state
-        for c in bot.bot.private_channels:
-            if c not in text_channels:
-                text_channels.append(c)
+        db_task = asyncio.create_task(init_db())
         
-        logger.info(f"[on_ready] Found {len(text_channels)} channels to backfill")
+        try:
+            # Enumerate channels while those are in flight
+            # Filter for TextChannels, DMs, and GroupChats where the bot has read permissions
+            text_channels = [
+                c for c in bot.bot.get_all_channels() 
+                if isinstance(c, (discord.TextChannel, discord.DMChannel, discord.GroupChannel))
+            ]
+            # Also check private_channels as get_all_channels might miss some DMs depending on cache state
+            seen_channels = set(text_channels)
+            for c in bot.bot.private_channels:
+                if c not in seen_channels:
+                    text_channels.append(c)
+            
+            logger.info(f"[on_ready] Found {len(text_channels)} channels to backfill")
+
+            await db_task
+            logger.info("[on_ready] Database initialized")
+        except BaseException:
+            # Startup failed: stop MCP setup and collect both outcomes, so neither
+            # task is left running or with an unretrieved exception
+            mcp_task.cancel()
+            db_task.cancel()
+            await asyncio.gather(mcp_task, db_task, return_exceptions=True)
+            raise
+        # Ensure MCP tools are connected/initialized
+        await mcp_task
+
+        # Keep the in-memory context cache bounded and start applying queued edits/deletes
+        start_cache_sweeper()
+        start_cache_ops_worker()
         
         # Start backfill task with error handling and post-sync
         async def run_backfill_and_sync():
@@ -105,20 +162,31 @@ def setup_chat(bot):
     async def on_message(message):
         # Update cache with new message (both user and bot messages for full context)
         await append_message_to_cache(message)
+
+        # Most messages carry neither prefix: one dict lookup and we're done
+        kind = prefix_kinds.get(message.content[:1])
+        if kind is None:
+            return
         
         # Allow normal bot commands to be handled by discord.py
-        if message.content.startswith(bot.prefix):
-            await bot.bot.process_commands(message)
-            return
+        if kind == "command":
+            if message.content.startswith(bot.prefix):
+                await bot.bot.process_commands(message)
+                return
+            if not message.content.startswith(CHATBOT_PREFIX):
+                return
+            kind = "chat"
 
         # Chatbot prefix (!) — handle via Team
-        chatbot_prefix = "!"
-        if message.content.startswith(chatbot_prefix):
+        if kind == "chat":
+            # One reference time for every relative timestamp in this reply's prompt
+            now = datetime.now(timezone.utc)
+
             # Step 1: replace mentions with readable form for context
             processed_content = resolve_mentions(message)
             
             # Extract the prompt after the prefix
-            raw_prompt = processed_content[len(chatbot_prefix):].strip()
+            raw_prompt = processed_content[len(CHATBOT_PREFIX):].strip()
             if not raw_prompt:
                 return
 
@@ -128,35 +196,34 @@ def setup_chat(bot):
             # Try to find reply context if present
             reply_to_message = None
             if message.reference and message.reference.resolved:
-                if isinstance(message.reference.resolved, type(message)):
+                if isinstance(message.reference.resolved, discord.Message):
                     reply_to_message = message.reference.resolved
                     logger.info(f"[chatbot] Found reply context: {reply_to_message.id}")
             elif message.reference and message.reference.message_id:
-                try:
-                    reply_to_message = await message.channel.fetch_message(message.reference.message_id)
-                    logger.info(f"[chatbot] Fetched reply context: {reply_to_message.id}")
-                except Exception as e:
-                    logger.warning(f"[chatbot] Failed to fetch reply context: {e}")
+                ref_id = message.reference.message_id
+                # Check discord.py's message cache before paying for an HTTP round-trip;
+                # it holds full Messages, so the reply's image attachments still come along
+                reply_to_message = discord.utils.get(bot.bot.cached_messages, id=ref_id)
+                if reply_to_message is not None:
+                    logger.info(f"[chatbot] Found cached reply context: {ref_id}")
+                else:
+                    try:
+                        reply_to_message = await message.channel.fetch_message(ref_id)
+                        logger.info(f"[chatbot] Fetched reply context: {reply_to_message.id}")
+                    except Exception as e:
+                        logger.warning(f"[chatbot] Failed to fetch reply context: {e}")
 
-            prompt = await build_context_prompt(message, raw_prompt, limit=TEAM_LEADER_CONTEXT_LIMIT, reply_to_message=reply_to_message)
+            prompt = await build_context_prompt(
+                message, raw_prompt, limit=TEAM_LEADER_CONTEXT_LIMIT, reply_to_message=reply_to_message, now=now
+            )
             logger.info(f"[chatbot] Context prompt built, length: {len(prompt)} characters")
 
             # Extract images from current message and reply
-            images = []
-            
-            # 1. Current message attachments
-            if message.attachments:
-                for attachment in message.attachments:
-                    if attachment.content_type and attachment.content_type.startswith('image/'):
-                        images.append(Image(url=attachment.url))
-                        logger.info(f"[chatbot] Found image attachment: {attachment.url}")
-
-            # 2. Reply message attachments (if any)
-            if reply_to_message and reply_to_message.attachments:
-                for attachment in reply_to_message.attachments:
-                    if attachment.content_type and attachment.content_type.startswith('image/'):
-                        images.append(Image(url=attachment.url))
-                        logger.info(f"[chatbot] Found reply image attachment: {attachment.url}")
+            images = _image_attachments(message.attachments)
+            if reply_to_message:
+                images += _image_attachments(reply_to_message.attachments)
+            if images:
+                logger.debug("[chatbot] %d image attachments", len(images))
 
             # Step 3: run the Team (shared session per channel)
             async with message.channel.typing():
@@ -192,31 +259,35 @@ def setup_chat(bot):
             # Remove any agent-supplied prefix artifacts
             final_reply = final_reply.replace("**🗿 hero:**", "")
             # Replace any leftover plain @name with actual mentions
-            final_reply = correct_mentions(prompt, final_reply)
+            final_reply = correct_mentions(_mention_source(message, reply_to_message, prompt), final_reply)
             
             # Append time taken
             final_reply += f"\n\n*(Time taken: {time_taken:.2f}s)*"
             
             # Step 5: send reply, chunking long outputs (Discord limit is ~2000 chars)
             chunk_size = 1900
+            # Chunks are cut at fixed offsets (often mid-sentence), so they go out
+            # one at a time; concurrent sends can land out of order.
             for chunk in [final_reply[i:i+chunk_size] for i in range(0, len(final_reply), chunk_size)]:
                 await message.channel.send(f"**🗿 hero:**\n{chunk}")
 
     @bot.event
     async def on_message_edit(before, after):
         """Handle message edits to update cache."""
-        await update_message_in_cache(before, after)
+        await enqueue_cache_op("update", before, after)
 
     @bot.event
     async def on_message_delete(message):
         """Handle message deletions to update cache."""
-        await delete_message_from_cache(message)
+        await enqueue_cache_op("delete", message)
 
 
 async def main_cli():
     """
     CLI entrypoint — create a per-user Team and run its CLI app if available.
     """
+    from agent.agent_factory import create_team_for_user
+
     await setup_mcp()
     try:
         if sys.stdin and sys.stdin.isatty():
@@ -6,11 +6,16 @@ Optimized for persistence using PostgreSQL.
 
 import os
 import time
+import asyncio
 import logging
-from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
 from typing import List, Optional, Dict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
-from core.database import store_message, get_messages, get_message_count, is_channel_fully_backfilled, mark_channel_fully_backfilled
+from core.database import store_message, store_message_many, store_messages_bulk, get_messages, get_messages_with_meta, get_message_count, mark_channel_fully_backfilled
 import discord
 
 load_dotenv()
@@ -24,96 +29,223 @@ logger = logging.getLogger(__name__)
 
 # Cache configuration
 CACHE_TTL = int(os.getenv("CACHE_TTL", "120"))  # seconds
-from core.config import CONTEXT_AGENT_MAX_MESSAGES
+from core.config import CONTEXT_AGENT_MAX_MESSAGES, MAX_PROMPT_CHARS
 MAX_MESSAGES_IN_CACHE = CONTEXT_AGENT_MAX_MESSAGES
 
+# In-memory cache bounds: per-channel depth, number of channels kept (LRU),
+# and how often stale channels are swept out.
+MEMORY_CACHE_MAX_MESSAGES = int(os.getenv("MEMORY_CACHE_MAX_MESSAGES", "2000"))
+MAX_CACHED_CHANNELS = int(os.getenv("MAX_CACHED_CHANNELS", "200"))
+CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # seconds
+
 # Timezone configuration
+_timezone_str = os.getenv("DISCORD_TIMEZONE", "Asia/Kolkata")
 try:
-    import pytz
-    _timezone_str = os.getenv("DISCORD_TIMEZONE", "Asia/Kolkata")
-    _timezone = pytz.timezone(_timezone_str)
-    _has_pytz = True
-except ImportError:
+    _timezone = ZoneInfo(_timezone_str)
+except (ZoneInfoNotFoundError, ValueError):
+    logger.warning(f"Unknown timezone '{_timezone_str}', using UTC.")
     _timezone_str = "UTC"
     _timezone = timezone.utc
-    _has_pytz = False
-    logger.warning("pytz not installed, using UTC. Install pytz for timezone support.")
 
 
-def format_message_timestamp(message_created_at, current_time: datetime) -> str:
+def _epoch_now(now: Optional[datetime] = None) -> int:
+    """Epoch seconds of `now`, or of the current time when not given."""
+    return int(time.time()) if now is None else _to_epoch(now)
+
+
+def _to_epoch(value) -> int:
+    """Epoch seconds for an int/float epoch or a datetime (naive means UTC)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+@lru_cache(maxsize=4096)
+def _format_absolute_timestamp(minute_epoch: int) -> str:
+    """Label for messages older than a week, cached per minute."""
+    return f"[{datetime.fromtimestamp(minute_epoch, _timezone).strftime('%b %d, %H:%M')}]"
+
+
+def format_message_timestamp(message_created_at, current_time) -> str:
     """
     Format message timestamp with relative time indication.
+
+    Both arguments may be datetimes or epoch seconds; callers formatting many
+    rows should pass the current time as an epoch computed once.
     """
     if not message_created_at:
         return ""
-    
-    if message_created_at.tzinfo is None:
-        message_created_at = message_created_at.replace(tzinfo=timezone.utc)
-    if current_time.tzinfo is None:
-        current_time = current_time.replace(tzinfo=timezone.utc)
-    
-    if _has_pytz and _timezone != timezone.utc:
-        try:
-            message_created_at = message_created_at.astimezone(_timezone)
-            current_time = current_time.astimezone(_timezone)
-        except Exception:
-            pass
-    
-    time_diff = current_time - message_created_at
-    
-    if time_diff < timedelta(minutes=1):
+
+    created_epoch = _to_epoch(message_created_at)
+    diff = _to_epoch(current_time) - created_epoch
+
+    if diff < 60:
         return "[just now]"
-    elif time_diff < timedelta(hours=1):
-        minutes = int(time_diff.total_seconds() / 60)
-        return f"[{minutes}m ago]"
-    elif time_diff < timedelta(days=1):
-        hours = int(time_diff.total_seconds() / 3600)
-        return f"[{hours}h ago]"
-    elif time_diff < timedelta(days=7):
-        days = time_diff.days
-        return f"[{days}d ago]"
+    elif diff < 3600:
+        return f"[{diff // 60}m ago]"
+    elif diff < 86400:
+        return f"[{diff // 3600}h ago]"
+    elif diff < 604800:
+        return f"[{diff // 86400}d ago]"
     else:
-        return f"[{message_created_at.strftime('%b %d, %H:%M')}]"
+        return _format_absolute_timestamp(created_epoch - created_epoch % 60)
+
+
+# ──────────────────────────────────────────────
+# In-Memory Cache (LRU + TTL, in front of the DB)
+# ──────────────────────────────────────────────
+
+# channel_id -> {"data": message_id -> DB row (chronological), "timestamp": last DB sync}
+_memory_cache: "OrderedDict[int, Dict]" = OrderedDict()
+_sweeper_task: Optional[asyncio.Task] = None
+# channel_id -> message_id -> row for new messages queued for the DB but not yet written
+_unflushed_rows: Dict[int, Dict[int, Dict]] = {}
+
+
+def _get_cache_entry(channel_id: int) -> Optional[Dict]:
+    """Return the cached entry for a channel and mark it as recently used."""
+    entry = _memory_cache.get(channel_id)
+    if entry is not None:
+        _memory_cache.move_to_end(channel_id)
+    return entry
+
+
+def _set_cache_entry(channel_id: int, rows: List[Dict]) -> List[Dict]:
+    """
+    Replace a channel's cached rows, evicting least recently used channels.
+    Messages newer than the newest DB row (still queued for the DB, or cached
+    while the read was in flight) are kept after it. Returns the cached rows.
+    """
+    newest_id = rows[-1]["message_id"] if rows else 0
+    newer = {}
+    old_entry = _memory_cache.get(channel_id)
+    if old_entry is not None:
+        newer.update((mid, r) for mid, r in old_entry["data"].items() if mid > newest_id)
+    newer.update((mid, r) for mid, r in _unflushed_rows.get(channel_id, {}).items() if mid > newest_id)
+    if newer:
+        rows = rows + [newer[mid] for mid in sorted(newer)]
+
+    _memory_cache[channel_id] = {
+        "data": OrderedDict((r["message_id"], r) for r in rows[-MEMORY_CACHE_MAX_MESSAGES:]),
+        "timestamp": time.time(),
+    }
+    _memory_cache.move_to_end(channel_id)
+    while len(_memory_cache) > MAX_CACHED_CHANNELS:
+        evicted_id, _ = _memory_cache.popitem(last=False)
+        logger.debug("[memory_cache] Evicted channel %s (LRU)", evicted_id)
+    return rows
+
+
+def _cache_row(row: Dict):
+    """Add a new row to its channel's cached window, if that channel is cached."""
+    entry = _memory_cache.get(row["channel_id"])
+    if entry is None:
+        return
+    data = entry["data"]
+    data[row["message_id"]] = row
+    if len(data) > MEMORY_CACHE_MAX_MESSAGES:
+        data.popitem(last=False)
+
+
+def _update_cached_row(channel_id: int, message_id: int, **fields):
+    entry = _memory_cache.get(channel_id)
+    if entry is not None and message_id in entry["data"]:
+        entry["data"][message_id].update(fields)
+
+
+def _remove_cached_row(channel_id: int, message_id: int):
+    entry = _memory_cache.get(channel_id)
+    if entry is not None:
+        entry["data"].pop(message_id, None)
+
+
+def invalidate_all_stale() -> int:
+    """Drop channels that have not been re-synced from the DB for a long time."""
+    cutoff = time.time() - CACHE_TTL * 10
+    stale = [cid for cid, entry in _memory_cache.items() if entry["timestamp"] < cutoff]
+    for cid in stale:
+        del _memory_cache[cid]
+    return len(stale)
+
+
+async def _cache_sweeper():
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_INTERVAL)
+        try:
+            evicted = invalidate_all_stale()
+            if evicted:
+                logger.info(f"[memory_cache] Swept {evicted} stale channels ({len(_memory_cache)} cached)")
+        except Exception as e:
+            logger.error(f"[memory_cache] Sweeper error: {e}", exc_info=True)
+
+
+def start_cache_sweeper():
+    """Start the background sweeper once (on_ready may fire again on reconnect)."""
+    global _sweeper_task
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.create_task(_cache_sweeper())
 
 
 # ──────────────────────────────────────────────
 # Fetch + Cache Recent Messages
 # ──────────────────────────────────────────────
 
-async def get_recent_context(channel, limit: int = 500, before_message=None) -> List[str]:
+def _format_rows(rows, current_epoch: int) -> List[str]:
+    """Render cached/DB rows as context lines, with relative time computed now."""
+    return [
+        "%s %s(%s): %s" % (
+            format_message_timestamp(m["created_at_epoch"], current_epoch),
+            m["author_name"], m["author_id"], m["content"],
+        )
+        for m in rows
+    ]
+
+
+async def get_recent_context(channel, limit: int = 500, before_message=None, now: Optional[datetime] = None) -> List[str]:
     """
     Get recent messages from DB or Discord API.
     Implements loop prevention to avoid infinite recursion.
+
+    Never returns more than `limit` lines: the memory path walks back `limit`
+    rows, DB reads are LIMITed, the API fetch stops at `limit`, and the older
+    window is only read for what is still missing. Callers need not re-slice.
     """
     channel_id = channel.id
+    # One clock read (or the caller's) shared by every formatting path below
+    current_epoch = _epoch_now(now)
+
+    # 0. Serve from memory while the channel was synced from the DB recently
+    mem_entry = _get_cache_entry(channel_id)
+    if mem_entry and current_epoch - mem_entry["timestamp"] < CACHE_TTL and len(mem_entry["data"]) >= limit:
+        # Walk back only `limit` rows from the newest end instead of copying everything
+        tail = list(islice(reversed(mem_entry["data"].values()), limit))
+        tail.reverse()
+        return _format_rows(tail, current_epoch)
     
-    # 1. Try DB first
-    db_messages = await get_messages(channel_id, limit)
+    # 1. Try DB first (the backfill flag comes back with the rows)
+    db_messages, is_full = await get_messages_with_meta(channel_id, limit)
     
     # If we have enough messages, return them
     # Note: We ignore 'before_message' for DB fetch simplicity for now, 
     # assuming we want the *latest* context. If strict pagination is needed, 
     # get_messages needs updating. For chatbot context, latest is usually what we want.
     if len(db_messages) >= limit and before_message is None:
-        formatted = []
-        current_time = datetime.now(timezone.utc)
-        for m in db_messages:
-            # Calculate relative time dynamically
-            rel_time = format_message_timestamp(m['created_at'], current_time)
-            formatted.append(f"{rel_time} {m['author_name']}({m['author_id']}): {m['content']}")
-        return formatted
+        rows = _set_cache_entry(channel_id, db_messages)
+        return _format_rows(rows[-limit:], current_epoch)
 
     # 2. If DB has insufficient data, we might rely on backfill or fetch fresh
     # For "instant" retrieval, we prefer DB. But if it's empty, we must fetch.
     if len(db_messages) == 0:
         logger.info(f"[get_recent_context] DB empty for {channel_id}, fetching from API.")
-        return await fetch_and_cache_from_api(channel, limit, before_message)
+        return await fetch_and_cache_from_api(channel, limit, before_message, now=now)
     
     # If we have some data but not enough, check if we can fetch more
+    more_messages = []
+    oldest_msg_id = None
     if len(db_messages) < limit:
-        # Check if channel is fully backfilled (meaning no more history exists)
-        is_full = await is_channel_fully_backfilled(channel_id)
-        
+        # Fully backfilled means no more history exists
         if not is_full:
             needed = limit - len(db_messages)
             logger.info(f"[get_recent_context] DB has {len(db_messages)} messages, need {needed} more. Fetching from API.")
@@ -134,25 +266,50 @@ async def get_recent_context(channel, limit: int = 500, before_message=None) ->
     # FIXED: Don't re-fetch in a loop. Return what we have after one attempt.
     logger.info(f"[get_recent_context] Returning {len(db_messages)} messages from DB (requested {limit}).")
     
-    # Format messages with current time (calculated once)
-    current_time = datetime.now(timezone.utc)
-    formatted = []
-    
-    # Re-query DB one final time to include any newly cached messages
-    final_db_messages = await get_messages(channel_id, limit)
-    
-    for m in final_db_messages:
-        rel_time = format_message_timestamp(m['created_at'], current_time)
-        formatted.append(f"{rel_time} {m['author_name']}({m['author_id']}): {m['content']}")
-    return formatted
+    # If the API fetch stored older messages, read just that older window
+    # (keyset on the oldest id we had) and put it in front of what we have
+    final_db_messages = db_messages
+    if more_messages:
+        older = await get_messages(channel_id, limit - len(db_messages), before_id=oldest_msg_id)
+        final_db_messages = older + db_messages
+    rows = _set_cache_entry(channel_id, final_db_messages)
+    return _format_rows(rows[-limit:], current_epoch)
+
+def message_row(channel, m) -> tuple:
+    """Row tuple (core.database.MESSAGE_COLUMNS order) for a fetched Discord message."""
+    # Build content with attachments and embeds
+    content_parts = []
+    if m.content:
+        content_parts.append(m.content)
+    if m.attachments:
+        for att in m.attachments:
+            content_parts.append(f"[Attachment: {att.url}]")
+    if m.embeds and not m.attachments:  # Only add embeds if no attachments (avoid duplication)
+        content_parts.append(f"[Embed: {len(m.embeds)} embed(s)]")
+
+    content = " ".join(content_parts) if content_parts else "[Empty message]"
+    # Store absolute timestamp for hygiene; relative time is computed at read time
+    timestamp_str = m.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    return (m.id, channel.id, m.author.id, m.author.display_name, content, m.created_at, timestamp_str)
+
+
+async def _persist_messages(channel, messages) -> List[tuple]:
+    """
+    Upsert already-fetched Discord messages in one bulk write (handles both
+    inserts and edits). Returns the stored rows.
+    """
+    rows = [message_row(channel, m) for m in messages]
+    await store_messages_bulk(rows)
+    return rows
+
 
-async def fetch_and_cache_from_api(channel, limit, before_message=None, after_message=None):
+async def fetch_and_cache_from_api(channel, limit, before_message=None, after_message=None, now: Optional[datetime] = None):
     """Helper to fetch from API and cache to DB."""
     try:
         channel_name = getattr(channel, "name", "DM")
         logger.info(f"[fetch_and_cache] Fetching up to {limit} messages for channel {channel_name} ({channel.id})")
         messages = []
-        current_time = datetime.now(timezone.utc)
+        current_epoch = _epoch_now(now)
         
         # Cap fetch_limit to prevent overwhelming the API (Discord max is 100 per request)
         # Reasonable cap: 1000 messages (10 API requests with proper pagination)
@@ -189,46 +346,15 @@ async def fetch_and_cache_from_api(channel, limit, before_message=None, after_me
         if not after_message:
             messages.reverse() # Chronological
         
-        formatted = []
-        stored_count = 0
-        fetched_message_ids = set()  # Track which messages we fetched from Discord
-        
-        for m in messages:
-            fetched_message_ids.add(m.id)
-            
-            # Store absolute timestamp for hygiene, but use dynamic relative time for return
-            timestamp_str = m.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            rel_time = format_message_timestamp(m.created_at, current_time)
-            
-            # Build content with attachments and embeds
-            content_parts = []
-            if m.content:
-                content_parts.append(m.content)
-            if m.attachments:
-                for att in m.attachments:
-                    content_parts.append(f"[Attachment: {att.url}]")
-            if m.embeds and not m.attachments:  # Only add embeds if no attachments (avoid duplication)
-                content_parts.append(f"[Embed: {len(m.embeds)} embed(s)]")
-            
-            content = " ".join(content_parts) if content_parts else "[Empty message]"
-            
-            # Store in DB (handles both insert and update for edits)
-            await store_message(
-                message_id=m.id,
-                channel_id=channel.id,
-                author_id=m.author.id,
-                author_name=m.author.display_name,
-                content=content,
-                created_at=m.created_at,
-                timestamp_str=timestamp_str
-            )
-            stored_count += 1
-            
-            formatted.append(
-                f"{rel_time} {m.author.display_name}({m.author.id}): {m.clean_content}"
+        rows = await _persist_messages(channel, messages)
+        formatted = [
+            "%s %s(%s): %s" % (
+                format_message_timestamp(m.created_at, current_epoch),
+                m.author.display_name, m.author.id, m.clean_content,
             )
-        
-        logger.info(f"[fetch_and_cache] Successfully stored {stored_count} messages for channel {channel.id}")
+            for m in messages
+        ]
+        logger.info(f"[fetch_and_cache] Successfully stored {len(rows)} messages for channel {channel.id}")
         return formatted
     except discord.errors.Forbidden:
         logger.warning(f"[fetch_and_cache] Missing access to channel {channel.id}. Skipping.")
@@ -238,23 +364,41 @@ async def fetch_and_cache_from_api(channel, limit, before_message=None, after_me
         return []
 
 
+async def get_recent_context_text(channel, limit: int = 500, before_message=None, now: Optional[datetime] = None) -> str:
+    """get_recent_context joined into one string."""
+    return "\n".join(await get_recent_context(channel, limit=limit, before_message=before_message, now=now))
+
+
 # ──────────────────────────────────────────────
 # Context Builder
 # ──────────────────────────────────────────────
 
-async def build_context_prompt(message, raw_prompt: str, limit: int = None, reply_to_message=None):
+def _trim_to_char_budget(text: str, budget: int) -> str:
+    """Keep the newest whole lines of text that fit in budget characters."""
+    if len(text) <= budget:
+        return text
+    cut = text.find("\n", len(text) - max(budget, 0) - 1)
+    kept = text[cut + 1:] if cut != -1 else ""
+    dropped = text.count("\n", 0, cut + 1) if cut != -1 else text.count("\n") + 1
+    logger.info(f"[build_context_prompt] Dropped {dropped} oldest lines to stay within {budget} chars")
+    return kept
+
+
+async def build_context_prompt(message, raw_prompt: str, limit: int = None, reply_to_message=None, now: Optional[datetime] = None):
     """
     Build a model-ready text prompt.
+    `now` (aware datetime) is the reference time for every relative timestamp
+    in the prompt; defaults to the current time.
     """
+    if now is None:
+        now = datetime.now(_timezone)
+    else:
+        now = now.astimezone(_timezone)
     if limit is None:
         limit = MAX_MESSAGES_IN_CACHE
 
     user_label = f"{message.author.display_name}({message.author.id})"
-    context_lines = await get_recent_context(message.channel, limit=limit, before_message=message)
-
-    # Trim if needed
-    if len(context_lines) > limit:
-        context_lines = context_lines[-limit:]
+    history = await get_recent_context_text(message.channel, limit=limit, before_message=message, now=now)
 
     # Metadata
     try:
@@ -271,14 +415,7 @@ async def build_context_prompt(message, raw_prompt: str, limit: int = None, repl
         "----\n"
     )
 
-    # Time
-    now = datetime.now(timezone.utc)
-    if _has_pytz and _timezone != timezone.utc:
-        try:
-            now = now.astimezone(_timezone)
-        except Exception:
-            pass
-            
+    # Time (_timezone was validated at import, so no per-call conversion guard is needed)
     current_time_str = now.strftime("%Y-%m-%d %H:%M:%S %Z")
     message_timestamp = format_message_timestamp(message.created_at, now) or "[now]"
 
@@ -295,17 +432,27 @@ async def build_context_prompt(message, raw_prompt: str, limit: int = None, repl
             f"----------------\n"
         )
 
-    prompt = (
-        f"{channel_meta}"
-        f"Current Time: {current_time_str}\n"
-        f"Timestamps are relative to this time.\n\n"
-        f"Conversation History:\n"
-        + "\n".join(context_lines)
-        + f"\n{reply_context_str}"
-        + f"\n{message_timestamp} {user_label} says: {raw_prompt}\n\n"
-        f"IMPORTANT: The message above is the CURRENT message that you need to respond to."
+    head = (
+        channel_meta,
+        f"Current Time: {current_time_str}\n",
+        "Timestamps are relative to this time.\n\n",
+        "Conversation History:\n",
     )
-    return prompt
+    tail = (
+        "\n",
+        reply_context_str,
+        "\n",
+        f"{message_timestamp} {user_label} says: {raw_prompt}\n\n",
+        "IMPORTANT: The message above is the CURRENT message that you need to respond to.",
+    )
+
+    # Drop the oldest history lines once the whole prompt would exceed
+    # MAX_PROMPT_CHARS; everything but the history is always kept.
+    history_budget = MAX_PROMPT_CHARS - sum(map(len, head)) - sum(map(len, tail))
+    history = _trim_to_char_budget(history, history_budget)
+
+    # One join instead of chained '+': the history part can be tens of KB
+    return "".join((*head, history, *tail))
 
 
 # ──────────────────────────────────────────────
@@ -314,32 +461,40 @@ async def build_context_prompt(message, raw_prompt: str, limit: int = None, repl
 
 async def append_message_to_cache(message):
     """
-    Append a new message to the DB.
+    Append a new message to the in-memory cache and queue it for the DB.
+    Only raw fields are kept; relative timestamps are formatted at read time.
     """
-    if not message.content.strip():
+    content = message.content
+    if not content or content.isspace():
         return
 
-    current_time = datetime.now(timezone.utc)
-    timestamp_str = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
-    
-    await store_message(
-        message_id=message.id,
-        channel_id=message.channel.id,
-        author_id=message.author.id,
-        author_name=message.author.display_name,
-        content=message.clean_content,
-        created_at=message.created_at,
-        timestamp_str=timestamp_str
-    )
+    # Read each field once; clean_content and display_name are computed properties
+    row = {
+        "message_id": message.id,
+        "channel_id": message.channel.id,
+        "author_id": message.author.id,
+        "author_name": message.author.display_name,
+        "content": message.clean_content,
+        "created_at": message.created_at,
+        "created_at_epoch": int(message.created_at.timestamp()),
+    }
+
+    # Readers see the message immediately; the DB write is queued so a burst
+    # of messages goes out as one batched upsert. Until it lands, DB reads
+    # won't have it, so _set_cache_entry carries it over from _unflushed_rows.
+    _cache_row(row)
+    pending = _unflushed_rows.setdefault(row["channel_id"], {})
+    pending[row["message_id"]] = row
+    if len(pending) > MEMORY_CACHE_MAX_MESSAGES:
+        # Only reachable while the DB keeps failing; drop the oldest
+        del pending[next(iter(pending))]
+    await enqueue_cache_op("store", row)
 
 
 async def update_message_in_cache(before, after):
     """
     Update a message in the DB when it's edited.
     """
-    from core.database import store_message
-    from datetime import datetime, timezone
-    
     # Build updated content with attachments
     content_parts = []
     if after.content:
@@ -363,6 +518,7 @@ async def update_message_in_cache(before, after):
         created_at=after.created_at,
         timestamp_str=timestamp_str
     )
+    _update_cached_row(after.channel.id, after.id, content=content, author_name=after.author.display_name)
 
 
 async def delete_message_from_cache(message):
@@ -371,7 +527,118 @@ async def delete_message_from_cache(message):
     """
     from core.database import delete_message
     await delete_message(message.id)
+    _remove_cached_row(message.channel.id, message.id)
 
 
 async def invalidate_cache(channel_id: int):
-    pass # No-op for DB
+    """Drop a channel from the in-memory cache (the DB copy is untouched)."""
+    _memory_cache.pop(channel_id, None)
+
+
+# ──────────────────────────────────────────────
+# Cache Mutation Queue
+# ──────────────────────────────────────────────
+
+# New/edit/delete events are queued and applied in order by a single worker,
+# so event handlers return as soon as the op is queued. Runs of consecutive
+# stores are written with one batched upsert.
+CACHE_OPS_BATCH_SIZE = 64
+# How long the worker waits for more new messages before flushing a store
+CACHE_FLUSH_MS = int(os.getenv("CACHE_FLUSH_MS", "50"))
+
+_cache_ops: "asyncio.Queue" = asyncio.Queue()
+_cache_ops_task: Optional[asyncio.Task] = None
+
+
+def _store_record(row: dict) -> tuple:
+    """Cached row dict -> tuple in core.database.MESSAGE_COLUMNS order."""
+    created_at = row["created_at"]
+    return (
+        row["message_id"], row["channel_id"], row["author_id"], row["author_name"],
+        row["content"], created_at, created_at.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+async def _flush_stores(rows: List[dict], retry: bool = True):
+    """
+    Write queued new messages. Rows leave _unflushed_rows only once stored; a
+    failed batch is queued again once, and after that stays visible in memory.
+    """
+    try:
+        await store_message_many([_store_record(row) for row in rows])
+    except Exception as e:
+        if retry:
+            logger.warning(f"[cache_ops] Failed to store {len(rows)} messages, retrying once: {e}")
+            await enqueue_cache_op("retry_store", *rows)
+        else:
+            logger.error(f"[cache_ops] Failed to store {len(rows)} messages: {e}", exc_info=True)
+        return
+
+    for row in rows:
+        pending = _unflushed_rows.get(row["channel_id"])
+        if pending is not None:
+            pending.pop(row["message_id"], None)
+            if not pending:
+                del _unflushed_rows[row["channel_id"]]
+
+
+async def _apply_cache_op(op: str, args: tuple):
+    if op == "store":
+        await _flush_stores(list(args))
+    elif op == "retry_store":
+        await _flush_stores(list(args), retry=False)
+    elif op == "update":
+        await update_message_in_cache(*args)
+    elif op == "delete":
+        await delete_message_from_cache(*args)
+    else:
+        logger.warning(f"[cache_ops] Unknown op '{op}'")
+
+
+async def _cache_ops_worker():
+    while True:
+        batch = [await _cache_ops.get()]
+        if batch[0][0] == "store" and CACHE_FLUSH_MS > 0:
+            # Give a burst of new messages a moment to pile up behind this one
+            await asyncio.sleep(CACHE_FLUSH_MS / 1000)
+        # Drain whatever else is already queued before going back to sleep
+        while len(batch) < CACHE_OPS_BATCH_SIZE:
+            try:
+                batch.append(_cache_ops.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        pending_stores: List[dict] = []
+        for op, args in batch:
+            if op == "store":
+                pending_stores.extend(args)
+                continue
+            # Keep ordering: anything stored before this edit/delete hits the DB first
+            if pending_stores:
+                await _flush_stores(pending_stores)
+                pending_stores = []
+            try:
+                await _apply_cache_op(op, args)
+            except Exception as e:
+                logger.error(f"[cache_ops] Failed to apply '{op}': {e}", exc_info=True)
+        if pending_stores:
+            await _flush_stores(pending_stores)
+
+        for _ in batch:
+            _cache_ops.task_done()
+
+
+def start_cache_ops_worker():
+    """Start the single cache-mutation worker once."""
+    global _cache_ops_task
+    if _cache_ops_task is None or _cache_ops_task.done():
+        _cache_ops_task = asyncio.create_task(_cache_ops_worker())
+
+
+async def enqueue_cache_op(op: str, *args):
+    """Queue a 'store' (row), 'update' (before, after) or 'delete' (message) cache mutation."""
+    if _cache_ops_task is None or _cache_ops_task.done():
+        # No worker yet (e.g. before on_ready): apply inline to keep ordering
+        await _apply_cache_op(op, args)
+        return
+    await _cache_ops.put((op, args))
@@ -1,14 +1,22 @@
 import re
 import logging
+from functools import lru_cache
+
+# <@123> and the nickname form <@!123>
+_MENTION_RE = re.compile(r"<@!?(\d+)>", re.ASCII)
+# @Name(ID) in model output (requires the @ symbol); captures name and ID
+_NAME_ID_MENTION_RE = re.compile(r"@([^\(\)<>]+?)\s*\((\d+)\)")
+# Name(ID) or @Name(ID) pairs in the prompt context
+_NAME_ID_PAIR_RE = re.compile(r"@?([^\(\)<>\n]+?)\s*\((\d+)\)")
 
 def resolve_mentions(message):
     """
     Replace <@12345> mentions with human-readable '@Name(12345)' for the model.
     """
-    content = message.content
-    for user in message.mentions:
-        content = content.replace(f"<@{user.id}>", f"@{user.display_name}({user.id})")
-    return content
+    if not message.mentions:
+        return message.content
+    id_map = {user.id: f"@{user.display_name}({user.id})" for user in message.mentions}
+    return _MENTION_RE.sub(lambda m: id_map.get(int(m.group(1)), m.group(0)), message.content)
 
 def restore_mentions(response, guild):
     """
@@ -16,17 +24,19 @@ def restore_mentions(response, guild):
     Only converts when @ symbol is present.
     Handles variations like '@Name(ID)', '@Name (ID)', etc.
     """
-    # Pattern: Matches ONLY @Name(ID) format (requires @ symbol)
-    # Captures the name and the ID
-    pattern = r"@([^\(\)<>]+?)\s*\((\d+)\)"
-    
-    def repl(match):
-        user_id = match.group(2)
-        return f"<@{user_id}>"
-    
     # Apply pattern to replace all instances
-    response = re.sub(pattern, repl, response)
-    return response
+    return _NAME_ID_MENTION_RE.sub(r"<@\2>", response)
+
+@lru_cache(maxsize=128)
+def _names_pattern(sorted_names):
+    """One case-insensitive alternation over all names, cached per name tuple."""
+    # Pattern:
+    # @?       - Optional @ prefix (we want to match "Name" or "@Name")
+    # (a|b|c)  - The escaped names, longest first so "Robert" wins over "Rob"
+    # (?!\s*\() - Negative lookahead: NOT followed by optional space and opening paren (ID)
+    # (?=[^a-zA-Z0-9_]|$) - Followed by non-word char or end of string (no partial names)
+    alternation = "|".join(re.escape(name) for name in sorted_names)
+    return re.compile(rf"@?({alternation})(?!\s*\()(?=[^a-zA-Z0-9_]|$)", re.IGNORECASE)
 
 def correct_mentions(prompt, response):
     """
@@ -36,7 +46,7 @@ def correct_mentions(prompt, response):
     # Extract name-id pairs from prompt in order (oldest to newest).
     # Matches "Name(ID)" or "@Name(ID)" patterns common in the context.
     # We do NOT use set() here to preserve order.
-    matches = re.findall(r"@?([^\(\)<>\n]+?)\s*\((\d+)\)", prompt)
+    matches = _NAME_ID_PAIR_RE.findall(prompt)
     
     # Create mapping - later occurrences (more recent) overwrite earlier ones
     name_to_id = {name.strip(): uid for name, uid in matches if name.strip()}
@@ -44,32 +54,21 @@ def correct_mentions(prompt, response):
     # Sort by name length descending to prevent partial matches
     sorted_names = sorted(name_to_id.keys(), key=len, reverse=True)
     
+    if not sorted_names:
+        return response
+
     logger = logging.getLogger(__name__)
-    if sorted_names:
-        logger.info(f"[correct_mentions] Found {len(sorted_names)} names in prompt: {sorted_names}")
-    
-    for name in sorted_names:
-        uid = name_to_id[name]
-        # Regex to match @Name not followed by (ID)
-        # We use \b for word boundary, but we also need to handle cases where punctuation is immediately after
-        # like @Name! or @Name? or @Name.
-        # The negative lookahead (?!\s*\() ensures we don't replace if it's already in Name(ID) format
-        
-        # Escaped name for regex
-        esc_name = re.escape(name)
-        
-        # Pattern:
-        # @?       - Optional @ prefix (we want to match "Name" or "@Name")
-        # {esc_name} - The name itself
-        # (?!\s*\() - Negative lookahead: NOT followed by optional space and opening paren (ID)
-        # (?=[^a-zA-Z0-9_]|$) - Positive lookahead: Followed by non-word char or end of string (ensures we don't match partial names like "Rob" in "Robert")
-        
-        pattern = re.compile(rf"@?{esc_name}(?!\s*\()(?=[^a-zA-Z0-9_]|$)", re.IGNORECASE)
-        
-        # Check if we have matches before replacing (for logging)
-        if pattern.search(response):
-            logger.info(f"[correct_mentions] Replacing '{name}' with '<@{uid}>'")
-            # Replace with <@ID>
-            response = pattern.sub(f"<@{uid}>", response)
-        
+    # Lazy %-args: the name list repr is only built if INFO is enabled
+    logger.info("[correct_mentions] Found %d names in prompt: %s", len(sorted_names), sorted_names)
+
+    # Match on the lowercased name; the pattern is case-insensitive
+    lower_to_id = {name.lower(): name_to_id[name] for name in sorted_names}
+
+    def repl(match):
+        uid = lower_to_id.get(match.group(1).lower())
+        return f"<@{uid}>" if uid else match.group(0)
+
+    response, replaced = _names_pattern(tuple(sorted_names)).subn(repl, response)
+    if replaced:
+        logger.info(f"[correct_mentions] Replaced {replaced} plain mentions with <@ID>")
     return response
@@ -1,14 +1,19 @@
 """
 Message synchronization to detect edits/deletes that happened while bot was offline.
 """
+import os
+import asyncio
 import logging
 from typing import Set
 import discord
-from core.database import get_messages, delete_message
-from discord_bot.context_cache import fetch_and_cache_from_api
+from core.database import get_message_ids, delete_messages, store_messages_bulk
+from discord_bot.context_cache import message_row
 
 logger = logging.getLogger(__name__)
 
+# Channels synced at once; bounded to stay under Discord rate limits and the DB pool size
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "8"))
+
 async def sync_recent_messages(channel, sync_limit: int = 200):
     """
     Sync the most recent messages to detect edits/deletes that happened offline.
@@ -24,31 +29,34 @@ async def sync_recent_messages(channel, sync_limit: int = 200):
         logger.info(f"[Sync] Syncing last {sync_limit} messages for {channel_name} ({channel_id})")
         
         # 1. Get existing message IDs from database (most recent)
-        db_messages = await get_messages(channel_id, limit=sync_limit)
-        db_message_ids = {msg['message_id'] for msg in db_messages}
+        db_message_ids = set(await get_message_ids(channel_id, limit=sync_limit))
         
         if not db_message_ids:
             logger.info(f"[Sync] No messages in DB for {channel_name}, skipping sync")
             return
         
-        # 2. Fetch recent messages from Discord
-        discord_messages = []
+        # 2. Fetch recent messages from Discord once, keeping only ids and rows
+        #    (not the Message objects themselves)
+        discord_message_ids = set()
+        rows = []
         async for msg in channel.history(limit=sync_limit):
-            discord_messages.append(msg)
-        
-        discord_message_ids = {msg.id for msg in discord_messages}
+            discord_message_ids.add(msg.id)
+            if msg.content or msg.attachments or msg.embeds:
+                rows.append(message_row(channel, msg))
         
-        # 3. Update/insert messages from Discord (handles edits automatically via upsert)
-        await fetch_and_cache_from_api(channel, limit=sync_limit)
+        # 3. Update/insert messages from Discord (handles edits automatically via upsert).
+        #    A failed store must not skip delete detection below.
+        try:
+            await store_messages_bulk(rows)
+        except Exception as e:
+            logger.error(f"[Sync] Failed to store {len(rows)} messages for {channel_name}: {e}", exc_info=True)
         
         # 4. Find messages deleted from Discord
         deleted_ids = db_message_ids - discord_message_ids
         
         if deleted_ids:
             logger.info(f"[Sync] Found {len(deleted_ids)} deleted messages in {channel_name}")
-            for msg_id in deleted_ids:
-                await delete_message(msg_id)
-                logger.debug(f"[Sync] Deleted message {msg_id} from DB")
+            await delete_messages(list(deleted_ids))
         
         # 5. Log sync summary
         updated_count = len(discord_message_ids & db_message_ids)
@@ -75,16 +83,20 @@ async def sync_all_channels(channels, sync_limit: int = 200):
     """
     logger.info(f"[Sync] Starting post-backfill sync for {len(channels)} channels (last {sync_limit} messages each)")
     
-    synced = 0
-    failed = 0
-    
-    for channel in channels:
-        try:
-            await sync_recent_messages(channel, sync_limit=sync_limit)
-            synced += 1
-        except Exception as e:
-            logger.error(f"[Sync] Failed to sync channel {channel.id}: {e}")
-            failed += 1
+    sem = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+    async def _run(channel) -> bool:
+        async with sem:
+            try:
+                await sync_recent_messages(channel, sync_limit=sync_limit)
+                return True
+            except Exception as e:
+                logger.error(f"[Sync] Failed to sync channel {channel.id}: {e}")
+                return False
+
+    results = await asyncio.gather(*(_run(channel) for channel in channels))
+    synced = sum(results)
+    failed = len(results) - synced
     
     logger.info(f"[Sync] ═══════════════════════════════════════")
     logger.info(f"[Sync] Sync complete: {synced}/{len(channels)} channels synced, {failed} failed")
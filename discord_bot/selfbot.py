@@ -1,9 +1,12 @@
 # selfbot.py  –  sees every message, only owner can trigger commands
 import os
 
-import discord
 from discord.ext import commands
 
+# Member-list chunking of every guild delays on_ready and nothing here needs
+# the full member cache (BioTools falls back to fetch_member).
+CHUNK_GUILDS_AT_STARTUP = os.getenv("CHUNK_GUILDS_AT_STARTUP", "false").lower() == "true"
+
 
 class SelfBot:
     def __init__(self, *, token: str = None, prefix: str = "!"):
@@ -16,6 +19,7 @@ class SelfBot:
         self.bot = commands.Bot(
             command_prefix=prefix,
             self_bot=True,
+            chunk_guilds_at_startup=CHUNK_GUILDS_AT_STARTUP,
         )
 
         self.prefix = prefix
@@ -24,11 +28,8 @@ class SelfBot:
         async def on_ready():
             print(f"[SELF-BOT] Logged in as {self.bot.user} (ID: {self.bot.user.id})")
 
-        @self.bot.event
-        async def on_message(message: discord.Message):
-            # let the bot SEE every message (no author filter)
-            if message.content.startswith(self.prefix):
-                await self.bot.process_commands(message)
+        # No on_message override: commands.Bot's default handler already calls
+        # process_commands, which does its own prefix match.
 
     def command(self, name: str = None, **kwargs):
         return self.bot.command(name=name, **kwargs)
@@ -1,10 +1,13 @@
 # tldr.py
 
 
+import asyncio
+import hashlib
 import os
+import time
+from collections import OrderedDict, deque
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 
 from discord_bot.selfbot import SelfBot
 
@@ -13,10 +16,33 @@ from discord_bot.selfbot import SelfBot
 # ──────────────────────────────────────────────
 
 load_dotenv()
-client = AsyncOpenAI(
-    base_url="https://api.groq.com/openai/v1",  # ← no spaces
-    api_key=os.getenv("GROQ_API_KEY"),
-)
+# Created on first .tldr; importing openai (httpx, pydantic) is a large
+# share of startup and most sessions never summarize anything.
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+
+        _client = AsyncOpenAI(
+            base_url="https://api.groq.com/openai/v1",  # ← no spaces
+            api_key=os.getenv("GROQ_API_KEY"),
+        )
+    return _client
+
+
+# Summaries of an unchanged set of messages are reused for a few minutes,
+# so repeating .tldr in a quiet channel doesn't cost another LLM call.
+SUMMARY_CACHE_TTL = 300  # seconds
+SUMMARY_CACHE_SIZE = 64
+_summary_cache: "OrderedDict[bytes, tuple]" = OrderedDict()  # key -> (expires, summary)
+_pending_summaries: dict = {}  # key -> Future of an in-flight request
+
+# Minimum gap between two .tldr runs in the same channel
+TLDR_DEBOUNCE_SECONDS = 2.0
+_last_tldr: dict = {}  # channel id -> monotonic time of a .tldr still inside its window
 
 # ──────────────────────────────────────────────
 # Public API: Setup TL;DR Command
@@ -24,16 +50,20 @@ client = AsyncOpenAI(
 
 
 def setup_tldr(bot: SelfBot):
+    # No author check: with self_bot=True, process_commands already ignores
+    # everyone but this account.
     @bot.command("tldr")
     async def tldr(ctx, count: int = 50):
-        if ctx.author.id != bot.bot.user.id:
-            return
-
         await ctx.message.delete(delay=1.5)
 
+        # A repeat inside the window is dropped; the first one's summary covers it
+        if _debounced(ctx.channel.id):
+            return
+
         messages = await _fetch_recent_messages(ctx, count)
         summary = await _summarize_messages(messages)
 
+        # Sent one at a time: chunks split mid-sentence and must stay in order
         for chunk in _chunk_text(summary):
             await ctx.send(f"**TL;DR:**\n{chunk}")
 
@@ -43,49 +73,108 @@ def setup_tldr(bot: SelfBot):
 # ──────────────────────────────────────────────
 
 
+def _debounced(channel_id: int) -> bool:
+    """True if a .tldr ran in this channel within the window; otherwise record this one."""
+    now = time.monotonic()
+    # Forget channels whose window has passed, so the map only holds recent runs
+    for expired in [cid for cid, t in _last_tldr.items() if now - t >= TLDR_DEBOUNCE_SECONDS]:
+        del _last_tldr[expired]
+    if channel_id in _last_tldr:
+        return True
+    _last_tldr[channel_id] = now
+    return False
+
+
 async def _fetch_recent_messages(ctx, count: int = 50, skip_existing_tldr: bool = True):
+    # Resolved once instead of through ctx.bot.user for every message
+    bot_id = ctx.bot.user.id
+    # History arrives newest first; prepend so the result is oldest first
+    # without a separate reverse pass
+    messages = deque()
     try:
-        messages = [
-            m
-            async for m in ctx.channel.history(limit=count)
-            if not (
+        # Start below the .tldr itself: it is new on every run and would make
+        # every summary key unique
+        async for m in ctx.channel.history(limit=count, before=ctx.message):
+            if (
                 skip_existing_tldr
-                and m.author.id == ctx.bot.user.id
+                and m.author.id == bot_id
                 and "**TL;DR:**" in m.content
-            )
-        ]
-        messages.reverse()
-        return messages
+            ):
+                continue
+            messages.appendleft(m)
+        return list(messages)
     except Exception as e:
         await ctx.send(f"Could not fetch history: {e}", delete_after=10)
         return []
 
 
 async def _summarize_messages(messages):
-    prompt = _build_prompt(messages)
+    key = _summary_key(messages)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        expires, summary = cached
+        if time.monotonic() < expires:
+            _summary_cache.move_to_end(key)
+            return summary
+        del _summary_cache[key]
+
+    # Same messages already being summarized: wait for that request instead
+    # of sending a second identical one
+    pending = _pending_summaries.get(key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except Exception as e:
+            return f"OpenAI error: {e}"
+
+    future = asyncio.get_running_loop().create_future()
+    _pending_summaries[key] = future
     try:
-        response = await client.chat.completions.create(
-            model="llama-3.1-70b-versatile",  # Fixed: Use valid Groq model instead of moonshot
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-        )
-        return response.choices[0].message.content.strip()
+        summary = await _request_summary(_build_prompt(messages))
     except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Retrieved here so an unawaited failure isn't logged
         return f"OpenAI error: {e}"
+    else:
+        future.set_result(summary)
+        _summary_cache[key] = (time.monotonic() + SUMMARY_CACHE_TTL, summary)
+        if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+        return summary
+    finally:
+        del _pending_summaries[key]
+        if not future.done():
+            future.cancel()
+
+
+async def _request_summary(prompt: str) -> str:
+    response = await _get_client().chat.completions.create(
+        model="llama-3.1-70b-versatile",  # Fixed: Use valid Groq model instead of moonshot
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.4,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _summary_key(messages) -> bytes:
+    # Edits change the text being summarized, so they are part of the key
+    return hashlib.blake2b(
+        ",".join(f"{m.id}:{m.edited_at}" for m in messages).encode(),
+        digest_size=16,
+    ).digest()
 
 
 def _build_prompt(messages):
-    lines = []
-    for m in messages:
-        timestamp = m.created_at.strftime("%H:%M")
-        author = m.author.display_name
-        content = m.clean_content
-        lines.append(f"[{timestamp}] {author}: {content}")
+    lines = "\n".join(
+        f"[{m.created_at:%H:%M}] {m.author.display_name}: {m.clean_content}"
+        for m in messages
+    )
     return (
         "Summarize the following Discord conversation in 4-6 bullet points.\n\n"
-        + "\n".join(lines)
+        + lines
     )
 
 
 def _chunk_text(text, size: int = 1800):
-    return [text[i : i + size] for i in range(0, len(text), size)]
+    for i in range(0, len(text), size):
+        yield text[i : i + size]
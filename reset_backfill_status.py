@@ -5,43 +5,108 @@ Run this script to fix channels that have few messages but are marked as complet
 """
 import asyncio
 import asyncpg
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from core.config import POSTGRES_URL
 
-async def reset_backfill_status():
+# Channels marked complete with fewer stored messages than this are reset (90% of 50K target)
+FULL_BACKFILL_THRESHOLD = 45000
+
+# Both statements reset channels that are marked as fully backfilled but have
+# < 45K messages, and report the top channels in the same round-trip. The outer
+# SELECT sees the pre-UPDATE snapshot, so reset channels are patched from
+# `upd`; the LEFT JOIN keeps one row for the count even when channel_status
+# is empty.
+
+# Counts come from channel_status.message_count (kept current by triggers,
+# see core.database.create_schema), not from scanning messages.
+RESET_FROM_COUNTER_SQL = """
+    WITH upd AS (
+        UPDATE channel_status cs
+        SET is_fully_backfilled = FALSE, 
+            last_updated = CURRENT_TIMESTAMP
+        WHERE cs.is_fully_backfilled = TRUE
+        AND cs.message_count > 0
+        AND cs.message_count < $1
+        RETURNING cs.channel_id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM upd) AS reset_count,
+        top.channel_id,
+        top.is_fully_backfilled,
+        top.message_count
+    FROM (SELECT 1) one
+    LEFT JOIN LATERAL (
+        SELECT 
+            cs.channel_id, 
+            cs.is_fully_backfilled AND cs.channel_id NOT IN (SELECT channel_id FROM upd)
+                AS is_fully_backfilled,
+            cs.message_count
+        FROM channel_status cs
+        ORDER BY cs.message_count DESC
+        LIMIT 20
+    ) top ON TRUE
+    ORDER BY top.message_count DESC
+"""
+
+# For databases the bot hasn't migrated yet: per channel, count at most
+# FULL_BACKFILL_THRESHOLD rows off the (channel_id, ...) index instead of
+# aggregating the whole messages table.
+RESET_FROM_MESSAGES_SQL = """
+    WITH upd AS (
+        UPDATE channel_status cs
+        SET is_fully_backfilled = FALSE, 
+            last_updated = CURRENT_TIMESTAMP
+        WHERE cs.is_fully_backfilled = TRUE
+        AND EXISTS (SELECT 1 FROM messages m WHERE m.channel_id = cs.channel_id)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM (
+                SELECT 1 FROM messages m
+                WHERE m.channel_id = cs.channel_id
+                LIMIT $1
+            ) capped
+            HAVING COUNT(*) >= $1
+        )
+        RETURNING cs.channel_id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM upd) AS reset_count,
+        top.channel_id,
+        top.is_fully_backfilled,
+        top.message_count
+    FROM (SELECT 1) one
+    LEFT JOIN LATERAL (
+        SELECT 
+            cs.channel_id, 
+            cs.is_fully_backfilled AND cs.channel_id NOT IN (SELECT channel_id FROM upd)
+                AS is_fully_backfilled,
+            COALESCE(COUNT(m.message_id), 0) as message_count
+        FROM channel_status cs
+        LEFT JOIN messages m ON cs.channel_id = m.channel_id
+        GROUP BY cs.channel_id, cs.is_fully_backfilled
+        ORDER BY message_count DESC
+        LIMIT 20
+    ) top ON TRUE
+    ORDER BY top.message_count DESC
+"""
+
+
+async def reset_backfill_status(pool: asyncpg.Pool):
     """Reset fully_backfilled status for channels that clearly aren't full."""
-    conn = await asyncpg.connect(os.getenv("POSTGRES_URL"))
-    
-    try:
-        # Reset channels that are marked as fully backfilled but have < 45K messages (90% of 50K target)
-        result = await conn.execute("""
-            UPDATE channel_status
-            SET is_fully_backfilled = FALSE, 
-                last_updated = CURRENT_TIMESTAMP
-            WHERE is_fully_backfilled = TRUE
-            AND channel_id IN (
-                SELECT channel_id 
-                FROM messages 
-                GROUP BY channel_id 
-                HAVING COUNT(*) < 45000
+    async with pool.acquire() as conn:
+        # message_count only exists once the bot's create_schema has run
+        has_counter = await conn.fetchval("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'channel_status' AND column_name = 'message_count'
             )
         """)
-        print(f"✓ Reset backfill status: {result}")
-        
-        # Show current status
-        rows = await conn.fetch("""
-            SELECT 
-                cs.channel_id, 
-                cs.is_fully_backfilled, 
-                COALESCE(COUNT(m.message_id), 0) as message_count
-            FROM channel_status cs
-            LEFT JOIN messages m ON cs.channel_id = m.channel_id
-            GROUP BY cs.channel_id, cs.is_fully_backfilled
-            ORDER BY message_count DESC
-            LIMIT 20
-        """)
+        records = await conn.fetch(
+            RESET_FROM_COUNTER_SQL if has_counter else RESET_FROM_MESSAGES_SQL,
+            FULL_BACKFILL_THRESHOLD,
+        )
+        print(f"✓ Reset backfill status: UPDATE {records[0]['reset_count']}")
+        rows = [row for row in records if row['channel_id'] is not None]
         
         print("\nTop 20 channels by message count:")
         print(f"{'Channel ID':<20} {'Fully Backfilled':<20} {'Message Count':<15}")
@@ -50,9 +115,22 @@ async def reset_backfill_status():
             print(f"{row['channel_id']:<20} {str(row['is_fully_backfilled']):<20} {row['message_count']:<15}")
         
         print(f"\n✓ Complete! Restart your bot to resume backfilling.")
-        
+
+async def main():
+    if not POSTGRES_URL:
+        raise SystemExit("POSTGRES_URL is not set")
+    # Each statement runs once: skip JIT and prepared-statement caching
+    pool = await asyncpg.create_pool(
+        POSTGRES_URL,
+        min_size=1,
+        max_size=2,
+        statement_cache_size=0,
+        server_settings={"jit": "off"},
+    )
+    try:
+        await reset_backfill_status(pool)
     finally:
-        await conn.close()
+        await pool.close()
 
 if __name__ == "__main__":
-    asyncio.run(reset_backfill_status())
+    asyncio.run(main())
@@ -38,6 +38,8 @@ class TestClient(discord.Client):
             
             # Let's use a mock channel that has the client state but no guild
             class MockDMChannel:
+                __slots__ = ("_state", "guild", "id", "type")
+
                 def __init__(self, client):
                     self._state = client._connection
                     self.guild = None
@@ -47,7 +49,9 @@ class TestClient(discord.Client):
                 def __repr__(self):
                     return "<MockDMChannel>"
 
-            logger.info(f"ConnectionState attributes: {dir(self._connection)}")
+            # dir() of the connection state is long; only build it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"ConnectionState attributes: {dir(self._connection)}")
             channel = MockDMChannel(self)
             
         except Exception as e:
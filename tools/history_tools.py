@@ -1,5 +1,5 @@
 from agno.tools import Toolkit
-from discord_bot.context_cache import get_recent_context
+from discord_bot.context_cache import get_recent_context_text
 from core.execution_context import get_current_channel_id, get_current_channel
 from core.database import get_messages
 import logging
@@ -47,8 +47,7 @@ class HistoryTools(Toolkit):
         
         try:
             # Use get_recent_context which handles fetching if cache is insufficient
-            history_lines = await get_recent_context(channel, limit=limit)
-            return "\n".join(history_lines)
+            return await get_recent_context_text(channel, limit=limit)
         except Exception as e:
             logger.error(f"[HistoryTools] Error fetching history: {e}", exc_info=True)
             return f"Error fetching history: {str(e)}"
@@ -31,7 +31,7 @@ async def test_image_passing():
     mock_team.arun.return_value = future
     
     # Patch get_or_create_team to return our mock team
-    with patch('discord_bot.chat_handler.get_or_create_team', return_value=mock_team):
+    with patch('agent.agent_factory.get_or_create_team', return_value=mock_team):
         user_text = "Describe this image"
         user_id = "123"
         session_id = "456"